@@ -36,7 +36,7 @@ def eigen1D_Efield(wvlen, eps_r, dx, num_modes=10):
     Dxb = createDws('x', 'b', [dL,1], [Nx,1], matrix_format=matrix_format);
     #Epxx = grid_average(eps_r, 'x');
     #Tepxx = sp.spdiags(Epxx, 0, Nx, Nx, format=matrix_format)
-    invTepzz = sp.spdiags(1 /(eps_r), 0, Nx, Nx, format=matrix_format)
+    invTepzz = sp.diags(1 /(eps_r), 0, shape=(Nx, Nx), format='csr')
     I = sp.identity(Nx, format = matrix_format);
 
     M = invTepzz;
@@ -43,7 +43,7 @@ def eigenTE_Kx_Ky(wvlen, eps_r,  dL, Ky, num_modes = 10):
     # Epxx = grid_average(eps_r, 'x');
     # Epyy = grid_average(eps_r, 'y');
     #Tez =  sp.spdiags(np.diag(eps0*eps_r), 0, M,M, format = matrix_format)
-    invTepzz = sp.spdiags(1 / eps_r.flatten(), 0, M,M, format=matrix_format)
+    invTepzz = sp.diags(1 / eps_r.flatten(), 0, shape=(M, M), format='csr')
     I = sp.identity(M, format = matrix_format);
 
     K = invTepzz@(-Dxf @ Dxb - Dyf @ Dyb - 1j*((Dyf + Dyb))*Ky + Ky**2*I) - omega ** 2*eps0 *mu0*I ;
@@ -38,11 +38,24 @@ def is_equal(matrix1, matrix2):
     return (matrix1 != matrix2).nnz == 0
 
 
+def diag_indices(A):
+    # finds where the diagonal entries of a canonical CSR matrix sit in A.data
+    # returns None if some diagonal entries are not stored explicitly
+
+    rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+    inds = np.flatnonzero(A.indices == rows)
+    if inds.size != min(A.shape):
+        return None
+    return inds
+
+
 def construct_A(omega, xrange, yrange, eps_r, NPML, pol, L0,
                 averaging=True,
                 timing=False,
                 matrix_format=DEFAULT_MATRIX_FORMAT):
     # makes the A matrix
+    # NOTE: diagonal matrices are always built directly in CSR, matrix_format
+    # only applies to the derivative operators
     N = np.asarray(eps_r.shape)  # Number of mesh cells
     M = np.prod(N)  # Number of unknowns
 
@@ -51,7 +64,7 @@ def construct_A(omega, xrange, yrange, eps_r, NPML, pol, L0,
 
     if pol == 'Ez':
         vector_eps_z = EPSILON_0_*eps_r.reshape((-1,))
-        T_eps_z = sp.spdiags(vector_eps_z, 0, M, M, format=matrix_format)
+        T_eps_z = sp.diags(vector_eps_z, 0, shape=(M, M), format='csr')
 
         (Sxf, Sxb, Syf, Syb) = S_create(omega, L0, N, NPML, xrange, yrange, matrix_format=matrix_format)
 
@@ -74,11 +87,9 @@ def construct_A(omega, xrange, yrange, eps_r, NPML, pol, L0,
             vector_eps_x = EPSILON_0_*eps_r.reshape((-1,))
             vector_eps_y = EPSILON_0_*eps_r.reshape((-1,))
 
-        # Setup the T_eps_x, T_eps_y, T_eps_x_inv, and T_eps_y_inv matrices
-        T_eps_x = sp.spdiags(vector_eps_x, 0, M, M, format=matrix_format)
-        T_eps_y = sp.spdiags(vector_eps_y, 0, M, M, format=matrix_format)
-        T_eps_x_inv = sp.spdiags(1/vector_eps_x, 0, M, M, format=matrix_format)
-        T_eps_y_inv = sp.spdiags(1/vector_eps_y, 0, M, M, format=matrix_format)
+        # Setup the T_eps_x_inv and T_eps_y_inv matrices
+        T_eps_x_inv = sp.diags(1/vector_eps_x, 0, shape=(M, M), format='csr')
+        T_eps_y_inv = sp.diags(1/vector_eps_y, 0, shape=(M, M), format='csr')
 
         (Sxf, Sxb, Syf, Syb) = S_create(omega, L0, N, NPML, xrange, yrange, matrix_format=matrix_format)
 
@@ -90,7 +101,7 @@ def construct_A(omega, xrange, yrange, eps_r, NPML, pol, L0,
 
         A = Dxf.dot(T_eps_x_inv).dot(Dxb) \
             + Dyf.dot(T_eps_y_inv).dot(Dyb) \
-            + omega**2*MU_0_*eye(M)
+            + omega**2*MU_0_*sp.eye(M, format='csr')
 
         # A = A / (omega**2*MU_0)     # normalize A to be unitless.  (note, this isn't in original fdfdpy)
 
@@ -119,6 +130,27 @@ def solver_eigs(A, Neigs, guess_value=0, guess_vector=None, timing=False):
     return (values, vectors)
 
 
+class CupySolver:
+    # keeps A on the GPU and solves A x = b there with cupy's sparse solver
+
+    def __init__(self, A):
+        try:
+            import cupy
+            import cupyx.scipy.sparse
+            import cupyx.scipy.sparse.linalg
+        except ImportError:
+            raise ImportError("solver='cupy' requires cupy to be installed")
+
+        self._cupy = cupy
+        self._spsolve = cupyx.scipy.sparse.linalg.spsolve
+        self.A = cupyx.scipy.sparse.csr_matrix(A.tocsr().astype(np.complex128))
+
+    def solve(self, b):
+        b_gpu = self._cupy.asarray(b.astype(np.complex128))
+        x_gpu = self._spsolve(self.A, b_gpu)
+        return self._cupy.asnumpy(x_gpu)
+
+
 def solver_direct(A, b, timing=False, solver=DEFAULT_SOLVER):
     # solves linear system of equations
 
@@ -140,8 +172,11 @@ def solver_direct(A, b, timing=False, solver=DEFAULT_SOLVER):
     elif solver.lower() == 'scipy':
         x = spl.spsolve(A, b)
 
+    elif solver.lower() == 'cupy':
+        x = CupySolver(A).solve(b)
+
     else:
-        raise ValueError('Invalid solver choice: {}, options are pardiso or scipy'.format(str(solver)))
+        raise ValueError('Invalid solver choice: {}, options are pardiso, scipy or cupy'.format(str(solver)))
 
     if timing:
         print('Linear system solve took {:.2f} seconds'.format(time()-t))
@@ -149,6 +184,39 @@ def solver_direct(A, b, timing=False, solver=DEFAULT_SOLVER):
     return x
 
 
+def solver_factor(A, timing=False, solver=DEFAULT_SOLVER):
+    # factorizes A once so that repeated solves only need the triangular solves
+
+    if timing:
+        t = time()
+
+    if solver.lower() == 'pardiso':
+        factor = pardisoSolver(A, mtype=13) # Matrix is complex unsymmetric due to SC-PML
+        factor.factor()
+
+    elif solver.lower() == 'scipy':
+        factor = spl.splu(A.tocsc())
+
+    elif solver.lower() == 'cupy':
+        # no factorization on the GPU, but A only gets copied to the device once
+        factor = CupySolver(A)
+
+    else:
+        raise ValueError('Invalid solver choice: {}, options are pardiso, scipy or cupy'.format(str(solver)))
+
+    if timing:
+        print('Matrix factorization took {:.2f} seconds'.format(time()-t))
+
+    return factor
+
+
+def solver_clear(factor):
+    # releases the solver memory held by a factorization from solver_factor()
+
+    if isinstance(factor, pardisoSolver):
+        factor.clear()
+
+
 def solver_complex2real(A11, A12, b, timing=False, solver=DEFAULT_SOLVER):
     # solves linear system of equations [A11, A12; A21*, A22*]*[x; x*] = [b; b*]
 
@@ -2,7 +2,6 @@ import numpy as np
 import numpy.linalg as la
 import scipy.sparse as sp
 import scipy.sparse.linalg as spl
-from copy import deepcopy
 
 from fdfdpy.linalg import grid_average, solver_direct, solver_complex2real
 from fdfdpy.derivatives import unpack_derivs
@@ -21,10 +20,10 @@ def born_solve(simulation,
 	if simulation.pol == 'Ez':
 		# Defne the starting field for the simulation
 		if Estart is None:
-			if simulation.fields['Ez'] is None:
+			if simulation.fields.Ez is None:
 				(_, _, Ez) = simulation.solve_fields()
 			else:
-				Ez = deepcopy(simulation.fields['Ez'])
+				Ez = simulation.fields.Ez.copy()
 		else:
 			Ez = Estart
 
@@ -69,10 +68,10 @@ def newton_solve(simulation,
 	if simulation.pol == 'Ez':
 		# Defne the starting field for the simulation
 		if Estart is None:
-			if simulation.fields['Ez'] is None:
+			if simulation.fields.Ez is None:
 				(_, _, Ez) = simulation.solve_fields()
 			else:
-				Ez = deepcopy(simulation.fields['Ez'])
+				Ez = simulation.fields.Ez.copy()
 		else:
 			Ez = Estart
 
@@ -128,17 +127,17 @@ def nl_eq_and_jac(simulation,
 
 	if simulation.pol == 'Ez':
 		simulation.compute_nl(Ez)
-		Anl = simulation.A + simulation.Anl
-		fE = (Anl.dot(Ez.reshape(-1,)) - simulation.src.reshape(-1,)*1j*omega)
+		Anl = simulation.A_tot
+		fE = (Anl.dot(Ez.ravel()) - simulation.src.ravel()*1j*omega)
 
 		# Make it explicitly a column vector
 		fE = fE.reshape(Nbig, 1)
 
 		if compute_jac:
 			simulation.compute_nl(Ez)
-			dAde = (simulation.dnl_de).reshape((-1,))*omega**2*EPSILON_0_
-			Jac11 = Anl + sp.spdiags(dAde*Ez.reshape((-1,)), 0, Nbig, Nbig, format=matrix_format)
-			Jac12 = sp.spdiags(np.conj(dAde)*Ez.reshape((-1,)), 0, Nbig, Nbig, format=matrix_format)
+			dAde = (simulation.dnl_de).ravel()*omega**2*EPSILON_0_
+			Jac11 = Anl + sp.diags(dAde*Ez.ravel(), 0, shape=(Nbig, Nbig), format='csr')
+			Jac12 = sp.diags(np.conj(dAde)*Ez.ravel(), 0, shape=(Nbig, Nbig), format='csr')
 
 	else:
 		raise ValueError('Invalid polarization: {}'.format(str(self.pol)))
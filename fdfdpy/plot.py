@@ -3,6 +3,32 @@ import matplotlib.pyplot as plt
 import matplotlib as mpl
 
 
+def _on_axes(ax, contour_set):
+    # checks that a contour set is still drawn on ax (e.g. not removed by ax.cla())
+
+    if isinstance(contour_set, mpl.artist.Artist):
+        return contour_set in ax.get_children()
+    return all(c in ax.collections for c in contour_set.collections)
+
+
+def plt_outline(ax, outline_val):
+    # Draws the outline contours of outline_val on ax
+    # The contours are cached on ax, so redrawing an unchanged outline (e.g. in
+    # animations or sweeps) skips recomputing them
+
+    key = (outline_val.shape, hash(outline_val.tobytes()))
+    cached = getattr(ax, '_fdfdpy_outline', None)
+    if cached is not None and cached[0] == key and \
+            all(_on_axes(ax, cs) for cs in cached[1]):
+        return cached[1]
+
+    # Do black and white so we can see on both magma and RdBu
+    contours = (ax.contour(outline_val, levels=2, linewidths=1.0, colors='w'),
+                ax.contour(outline_val, levels=2, linewidths=0.5, colors='k'))
+    ax._fdfdpy_outline = (key, contours)
+    return contours
+
+
 def plt_base(field_val, outline_val, cmap, vmin, vmax, label,
              cbar=True, outline=None, ax=None):
     # Base plotting function for fields
@@ -19,9 +45,7 @@ def plt_base(field_val, outline_val, cmap, vmin, vmax, label,
         plt.colorbar(h, label=label, ax=ax)
 
     if outline:
-        # Do black and white so we can see on both magma and RdBu
-        ax.contour(outline_val, levels=2, linewidths=1.0, colors='w')
-        ax.contour(outline_val, levels=2, linewidths=0.5, colors='k')
+        plt_outline(ax, outline_val)
 
     ax.set_xticks([])
     ax.set_yticks([])
@@ -45,9 +69,7 @@ def plt_base_eps(field_val, outline_val, cmap, vmin, vmax,
         plt.colorbar(h, label='relative permittivity', ax=ax)
 
     if outline:
-        # Do black and white so we can see on both magma and RdBu
-        ax.contour(outline_val, levels=2, linewidths=1.0, colors='w')
-        ax.contour(outline_val, levels=2, linewidths=0.5, colors='k')
+        plt_outline(ax, outline_val)
 
     ax.set_xticks([])
     ax.set_yticks([])
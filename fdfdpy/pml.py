@@ -81,9 +81,9 @@ def S_create(omega, L0, N, Npml, xrange,
     Sy_b_vec = Sy_b_2D.reshape((-1,))
 
     # Construct the 1D total s-array into a diagonal matrix
-    Sx_f = sp.spdiags(Sx_f_vec, 0, M, M, format=matrix_format)
-    Sx_b = sp.spdiags(Sx_b_vec, 0, M, M, format=matrix_format)
-    Sy_f = sp.spdiags(Sy_f_vec, 0, M, M, format=matrix_format)
-    Sy_b = sp.spdiags(Sy_b_vec, 0, M, M, format=matrix_format)
+    Sx_f = sp.diags(Sx_f_vec, 0, shape=(M, M), format='csr')
+    Sx_b = sp.diags(Sx_b_vec, 0, shape=(M, M), format='csr')
+    Sy_f = sp.diags(Sy_f_vec, 0, shape=(M, M), format='csr')
+    Sy_b = sp.diags(Sy_b_vec, 0, shape=(M, M), format='csr')
 
     return (Sx_f, Sx_b, Sy_f, Sy_b)
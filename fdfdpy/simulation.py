@@ -1,8 +1,8 @@
 import numpy as np
 import scipy.sparse as sp
-from copy import deepcopy
 
-from fdfdpy.linalg import construct_A, solver_direct, grid_average
+from fdfdpy.linalg import (construct_A, solver_direct, solver_factor,
+                           solver_clear, grid_average, diag_indices)
 from fdfdpy.derivatives import unpack_derivs
 from fdfdpy.plot import plt_base, plt_base_eps
 from fdfdpy.nonlinear_solvers import born_solve, newton_solve
@@ -12,6 +12,107 @@ from fdfdpy.constants import (DEFAULT_LENGTH_SCALE, DEFAULT_MATRIX_FORMAT,
                               DEFAULT_SOLVER, EPSILON_0, MU_0)
 
 
+def _grid_avg_inline(field_slice, w):
+    # averages a slice one cell thick in w onto the probe plane
+    # (same as grid_average(field_slice, w)[:-1, :-1] for such a slice)
+
+    if w == 'x':
+        return (field_slice[:-1, :-1] + field_slice[1:, :-1])/2
+    else:
+        return (field_slice[:-1, :-1] + field_slice[:-1, 1:])/2
+
+
+def _accumulate(buf, term):
+    # buf += term in place, upcasting buf first if term is e.g. complex and buf is not
+
+    if not np.can_cast(np.result_type(term), buf.dtype):
+        buf = buf.astype(np.result_type(buf, term))
+    buf += term
+    return buf
+
+
+def _field_component(component):
+    # property exposing the slab of component, None until it is set
+    # (always None for the components of the other polarization)
+
+    def fget(self):
+        i = self._index.get(component)
+        if i is None or not self._is_set[i]:
+            return None
+        return self.buf[i]
+
+    def fset(self, value):
+        if value is None:
+            if component in self._index:
+                self._is_set[self._index[component]] = False
+        else:
+            self.slab(component)[...] = value
+
+    return property(fget, fset)
+
+
+class _Fields:
+    # the three field components of one polarization as slabs of one C-ordered
+    # (3, Nx, Ny) buffer, allocated when the first component is set,
+    # still indexable as fields['Ez']
+    # NOTE: each solve stores into a new _Fields rather than overwriting the
+    # buffer, so arrays handed out earlier are never modified
+
+    __slots__ = ('shape', 'buf', '_index', '_is_set')
+
+    _components = ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz')
+    _pol_components = {'Ez': ('Hx', 'Hy', 'Ez'), 'Hz': ('Ex', 'Ey', 'Hz')}
+
+    Ex = _field_component('Ex')
+    Ey = _field_component('Ey')
+    Ez = _field_component('Ez')
+    Hx = _field_component('Hx')
+    Hy = _field_component('Hy')
+    Hz = _field_component('Hz')
+
+    def __init__(self, shape, pol, **components):
+        self.shape = tuple(shape)
+        self.buf = None
+        self._index = {c: i for (i, c) in enumerate(self._pol_components[pol])}
+        self._is_set = [False]*3
+        for component, value in components.items():
+            setattr(self, component, value)
+
+    def slab(self, component):
+        # returns the slab of component for writing into directly, marking it set
+        if component not in self._index:
+            raise ValueError("{} is not a field component of this polarization".format(component))
+        if self.buf is None:
+            self.buf = np.empty((3,) + self.shape, dtype=np.complex128)
+        i = self._index[component]
+        self._is_set[i] = True
+        return self.buf[i]
+
+    def __getitem__(self, component):
+        if component not in self._components:
+            raise KeyError(component)
+        return getattr(self, component)
+
+    def __setitem__(self, component, value):
+        if component not in self._components:
+            raise KeyError(component)
+        setattr(self, component, value)
+
+    # the rest of the dict interface fields used to have, unset components are None
+
+    def __iter__(self):
+        return iter(self._components)
+
+    def keys(self):
+        return list(self._components)
+
+    def values(self):
+        return [getattr(self, component) for component in self._components]
+
+    def items(self):
+        return [(component, getattr(self, component)) for component in self._components]
+
+
 class Simulation:
 
     def __init__(self, omega, eps_r, dl, NPML, pol, L0=DEFAULT_LENGTH_SCALE):
@@ -25,22 +126,28 @@ class Simulation:
 
         self._check_inputs()
 
+        # stored unbound, as a bound method would keep self alive in a cycle
+        # and delay __del__ freeing the factorizations
+        if self.pol == 'Hz':
+            self._solve_impl = Simulation._solve_fields_Hz
+        else:
+            self._solve_impl = Simulation._solve_fields_Ez
+
         (Nx, Ny) = eps_r.shape
         self.Nx = Nx
         self.Ny = Ny
         self.mu_r = np.ones((self.Nx, self.Ny))
-        self.src = np.zeros((self.Nx, self.Ny))
+        self.src = np.zeros((self.Nx, self.Ny), dtype=np.complex128)
         self.xrange = [0, float(Nx*self.dl)]
         self.yrange = [0, float(Ny*self.dl)]
 
         # construct the system matrix
+        self._A_lu = None
+        self._A_nl_lu = None
         self.eps_r = eps_r
 
         self.modes = []
         self.nonlinearity = []
-        self.eps_nl = np.zeros(eps_r.shape)
-        self.dnl_de = np.zeros(eps_r.shape)
-        self.dnl_deps = np.zeros(eps_r.shape)
 
     def setup_modes(self):
         # calculates
@@ -55,18 +162,21 @@ class Simulation:
         self.modes.append(new_mode)
 
     def compute_nl(self, e, matrix_format=DEFAULT_MATRIX_FORMAT):
-        # evaluates the nonlinear functions for a field e
-        self.eps_nl = np.zeros(self.eps_r.shape)
-        self.dnl_de = np.zeros(self.eps_r.shape)
-        self.dnl_deps = np.zeros(self.eps_r.shape)
+        # evaluates the nonlinear functions for a field e, accumulating in place
+        self.eps_nl.fill(0.0)
+        self.dnl_de.fill(0.0)
+        self.dnl_deps.fill(0.0)
         for nli in self.nonlinearity:
-            self.eps_nl = self.eps_nl + nli.eps_nl(e, self.eps_r)
-            self.dnl_de = self.dnl_de + nli.dnl_de(e, self.eps_r)
-            self.dnl_deps = self.dnl_deps + nli.dnl_deps(e, self.eps_r)
+            self.eps_nl = _accumulate(self.eps_nl, nli.eps_nl(e, self.eps_r))
+            self.dnl_de = _accumulate(self.dnl_de, nli.dnl_de(e, self.eps_r))
+            self.dnl_deps = _accumulate(self.dnl_deps, nli.dnl_deps(e, self.eps_r))
         Nbig = self.Nx*self.Ny
-        Anl = sp.spdiags(self.omega**2*EPSILON_0*self.L0*self.eps_nl.reshape((-1,)), 0, Nbig, Nbig, format=matrix_format)
+        vector_nl = self.omega**2*EPSILON_0*self.L0*self.eps_nl.ravel()
+        Anl = sp.diags(vector_nl, 0, shape=(Nbig, Nbig), format='csr')
         self.Anl = Anl
 
+        self._update_A_tot(vector_nl)
+
     def add_nl(self, chi, nl_region, nl_type='kerr', eps_scale=False, eps_max=None):
         # adds a nonlinearity to the simulation
         new_nl = Nonlinearity(chi/np.square(self.L0), nl_region, nl_type, eps_scale, eps_max)
@@ -78,27 +188,163 @@ class Simulation:
 
     @eps_r.setter
     def eps_r(self, new_eps):
-        self.__eps_r = new_eps
+        # stored C-contiguous so that ravel() and reshape() below are views
+        new_eps = np.asarray(new_eps)
+        self.__eps_r = np.ascontiguousarray(new_eps, dtype=np.result_type(new_eps, np.float64))
+        self._eps_scaled = EPSILON_0*self.L0*self.__eps_r
+        # taken from omega and L0 here, like A, so a sweep setting sim.omega
+        # before a reset recovers the fields at the new omega
+        self._inv_jw = 1/(1j*self.omega)
+        self._inv_jw_mu0 = self._inv_jw/(MU_0*self.L0)
         (A, derivs) = construct_A(self.omega, self.xrange, self.yrange,
                                   self.eps_r, self.NPML, self.pol, self.L0,
                                   matrix_format=DEFAULT_MATRIX_FORMAT,
                                   timing=False)
+        A = A.tocsr()
+        A.sum_duplicates()
         self.A = A
+        self._A_diag_inds = diag_indices(A)
+        if self._A_diag_inds is not None:
+            self._A_diag = A.data[self._A_diag_inds].copy()
+        # keep the last nonlinear term, so that A + Anl stays solvable after a reset
+        self.A_tot = None
+        if getattr(self, 'Anl', None) is not None:
+            self._update_A_tot(self.Anl.diagonal())
         self.derivs = derivs
-        self.fields = {f: None for f in ['Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz']}
-        self.fields_nl = {f: None for f in ['Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz']}
+        (Dyb, Dxb, _, _) = unpack_derivs(derivs)
+        (self._Dyb, self._Dxb) = (Dyb.tocsr(), Dxb.tocsr())
+        self._inv_jw_eps_x_lin = None
+        self._inv_jw_eps_y_lin = None
+        self._alloc_nl()
+        self.clear_factor()
+        self._clear_fields()
+
+    def _update_A_tot(self, vector_nl):
+        # sets A_tot = A + Anl for the diagonal Anl given by vector_nl
+        # A_tot only differs from A on the diagonal, so that is all that gets updated
+
+        if self._A_diag_inds is None:
+            self.A_tot = self.A + sp.diags(vector_nl, 0, shape=self.A.shape, format='csr')
+        else:
+            if self.A_tot is None:
+                self.A_tot = self.A.copy()
+            self.A_tot.data[self._A_diag_inds] = self._A_diag + vector_nl
+
+    def __del__(self):
+        # pardiso factorizations are not freed when they are garbage collected
+        if '_A_lu' in self.__dict__:
+            self.clear_factor()
+
+    def __getstate__(self):
+        # the cached factorizations hold solver memory, so copies rebuild their own
+        state = self.__dict__.copy()
+        state['_A_lu'] = None
+        state['_A_nl_lu'] = None
+        return state
+
+    def _alloc_nl(self):
+        # buffers reused by compute_nl, eps_nl and dnl_deps follow the eps_r dtype
+        # (upcast in place of reallocating so a reset keeps the last nonlinear terms)
+        # and dnl_de is complex as it involves conj(e)
+        if getattr(self, 'eps_nl', None) is None:
+            self.eps_nl = np.zeros(self.__eps_r.shape, dtype=self.__eps_r.dtype)
+            self.dnl_deps = np.zeros(self.__eps_r.shape, dtype=self.__eps_r.dtype)
+            self.dnl_de = np.zeros(self.__eps_r.shape, dtype=np.complex128)
+        elif not np.can_cast(self.__eps_r.dtype, self.eps_nl.dtype):
+            self.eps_nl = self.eps_nl.astype(self.__eps_r.dtype)
+            self.dnl_deps = self.dnl_deps.astype(self.__eps_r.dtype)
+
+    def _clear_fields(self):
+        # drops the solved fields, which are stale once eps_r changes
+        self.fields = _Fields((self.Nx, self.Ny), self.pol)
+        self.fields_nl = _Fields((self.Nx, self.Ny), self.pol)
+
+    def clear_factor(self):
+        # frees the cached factorizations of A and A + Anl
+        # (done when eps_r changes or the simulation is deleted)
+        solver_clear(self._A_lu)
+        self._A_lu = None
+        self._A_lu_solver = None
+        self._clear_nl_factor()
+
+    def _clear_nl_factor(self):
+        # frees the factorization of A + Anl, which is only reused within one
+        # nonlinear solve, so that only the factorization of A stays cached
+        solver_clear(self._A_nl_lu)
+        self._A_nl_lu = None
+        self._A_nl_lu_solver = None
+
+    def _solve_linear(self, b, timing=False, solver=DEFAULT_SOLVER):
+        # solves A x = b, factorizing A only on the first call for each eps_r
+
+        b = b.astype(np.complex128).ravel()
+
+        if not b.any():
+            return np.zeros(b.shape, dtype=np.complex128)
+
+        if self._A_lu is None or self._A_lu_solver != solver.lower():
+            solver_clear(self._A_lu)
+            self._A_lu = solver_factor(self.A, timing=timing, solver=solver)
+            self._A_lu_solver = solver.lower()
+
+        return self._A_lu.solve(b)
+
+    def _solve_nl(self, b, timing=False, solver=DEFAULT_SOLVER,
+                  rtol=1e-13, max_refine=4, min_contraction=1e-3):
+        # solves (A + Anl) x = b from compute_nl()
+        # Anl changes little between nonlinear iterations, so the last factorization
+        # (of A + Anl at an earlier iterate, or of A) is reused through iterative
+        # refinement, and A + Anl is only refactorized if that does not converge
+
+        if self.A_tot is None:
+            raise ValueError("need to call compute_nl() before solving with include_nl=True")
+
+        b = b.astype(np.complex128).ravel()
+
+        if not b.any():
+            return np.zeros(b.shape, dtype=np.complex128)
+
+        # cupy does not factorize, so each refinement step would be a full solve
+        if solver.lower() == 'cupy':
+            return solver_direct(self.A_tot, b, timing=timing, solver=solver)
+
+        if self._A_nl_lu is not None and self._A_nl_lu_solver == solver.lower():
+            factor = self._A_nl_lu
+        elif self._A_lu is not None and self._A_lu_solver == solver.lower():
+            factor = self._A_lu
+        else:
+            factor = None
+
+        if factor is not None:
+            x = factor.solve(b)
+            dx_norm_prev = np.linalg.norm(x)
+            for _ in range(max_refine):
+                dx = factor.solve(b - self.A_tot.dot(x))
+                x = x + dx
+                dx_norm = np.linalg.norm(dx)
+                if dx_norm <= rtol*np.linalg.norm(x):
+                    return x
+                # contracting too slowly to reach rtol, cheaper to refactorize
+                if dx_norm > min_contraction*dx_norm_prev:
+                    break
+                dx_norm_prev = dx_norm
+
+        if timing:
+            print('Refactorizing A + Anl')
+
+        # factorize a copy, as pardiso keeps a reference to the data of its matrix
+        # and compute_nl() updates A_tot in place
+        solver_clear(self._A_nl_lu)
+        self._A_nl_lu = solver_factor(self.A_tot.copy(), timing=timing, solver=solver)
+        self._A_nl_lu_solver = solver.lower()
+
+        return self._A_nl_lu.solve(b)
 
     def reset_eps(self, new_eps):
         # in here for compatibility for now..
+        # the eps_r setter already rebuilds A and clears the fields
 
         self.eps_r = new_eps
-        (A, derivs) = construct_A(self.omega, self.xrange, self.yrange, self.eps_r, self.NPML, self.pol, self.L0,
-                                matrix_format=DEFAULT_MATRIX_FORMAT,
-                                timing=False)
-        self.A = A
-        self.derivs = derivs
-        self.fields = {f: None for f in ['Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz']}
-        self.fields_nl = {f: None for f in ['Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz']}
 
     def compute_index_shift(self):
         """ Computes array of nonlinear refractive index shift"""
@@ -112,70 +358,107 @@ class Simulation:
     def solve_fields(self, include_nl=False, timing=False, averaging=True, solver=DEFAULT_SOLVER,
                      matrix_format=DEFAULT_MATRIX_FORMAT):
         # performs direct solve for A given source
+        # dispatches to _solve_fields_Ez or _solve_fields_Hz, picked in __init__
+
+        return self._solve_impl(self, include_nl, timing, averaging, solver, matrix_format)
 
-        EPSILON_0_ = EPSILON_0*self.L0
-        MU_0_ = MU_0*self.L0
+    def _solve_primary(self, include_nl=False, timing=False, solver=DEFAULT_SOLVER):
+        # solves for the flattened out-of-plane field (Ez or Hz)
 
         if include_nl==False:
-            eps_tot = self.eps_r
-            X = solver_direct(self.A, self.src*1j*self.omega, timing=timing,
-                solver=solver)
+            return self._solve_linear(self.src*1j*self.omega, timing=timing,
+                                      solver=solver)
         else:
-            eps_tot = self.eps_r + self.eps_nl
-            X = solver_direct(self.A + self.Anl, self.src*1j*self.omega, timing=timing,
-                solver=solver)
+            return self._solve_nl(self.src*1j*self.omega, timing=timing,
+                                  solver=solver)
+
+    def _solve_fields_Hz(self, include_nl=False, timing=False, averaging=True,
+                         solver=DEFAULT_SOLVER, matrix_format=DEFAULT_MATRIX_FORMAT):
+        # solves for Hz and recovers Ex, Ey from it
+
+        X = self._solve_primary(include_nl, timing, solver)
+
+        (Nx, Ny) = (self.Nx, self.Ny)
+        (Dyb, Dxb) = (self._Dyb, self._Dxb)
+
+        if include_nl==False and averaging:
+            # the linear inverse permittivities only change with eps_r
+            if self._inv_jw_eps_x_lin is None:
+                (self._inv_jw_eps_x_lin, self._inv_jw_eps_y_lin) = \
+                    self._inv_jw_eps(self._eps_scaled, averaging)
+            inv_jw_eps_x = self._inv_jw_eps_x_lin
+            inv_jw_eps_y = self._inv_jw_eps_y_lin
+        elif include_nl==False:
+            (inv_jw_eps_x, inv_jw_eps_y) = self._inv_jw_eps(self._eps_scaled, averaging)
+        else:
+            eps_scaled = self._eps_scaled + EPSILON_0*self.L0*self.eps_nl
+            (inv_jw_eps_x, inv_jw_eps_y) = self._inv_jw_eps(eps_scaled, averaging)
 
+        # linear solves write straight into the buffer of a new field record
+        if include_nl==False:
+            fields = _Fields((Nx, Ny), self.pol)
+            Ex = fields.slab('Ex')
+            Ey = fields.slab('Ey')
+            Hz = fields.slab('Hz')
+            Hz[...] = X.reshape((Nx, Ny))
+        else:
+            Ex = np.empty((Nx, Ny), dtype=np.complex128)
+            Ey = np.empty((Nx, Ny), dtype=np.complex128)
+            Hz = X.reshape((Nx, Ny))
 
-        (Nx, Ny) = self.src.shape
-        M = Nx*Ny
-        (Dyb, Dxb, Dxf, Dyf) = unpack_derivs(self.derivs)
+        # scale the matvecs instead of forming T_eps_inv*D
+        np.multiply(Dyb.dot(X), inv_jw_eps_y, out=Ex.reshape(-1))
+        np.multiply(Dxb.dot(X), inv_jw_eps_x, out=Ey.reshape(-1))
+        np.negative(Ey, out=Ey)
 
-        if self.pol == 'Hz':
-            if averaging:
-                eps_x = grid_average(EPSILON_0_*(eps_tot), 'x')
-                vector_eps_x = eps_x.reshape((-1,))
-                eps_y = grid_average(EPSILON_0_*(eps_tot), 'y')
-                vector_eps_y = eps_y.reshape((-1,))
-            else:
-                vector_eps_x = EPSILON_0_*(eps_tot).reshape((-1,))
-                vector_eps_y = EPSILON_0_*(eps_tot).reshape((-1,))
+        if include_nl==False:
+            self.fields = fields
 
-            T_eps_x_inv = sp.spdiags(1/vector_eps_x, 0, M, M,
-                                  format=matrix_format)
-            T_eps_y_inv = sp.spdiags(1/vector_eps_y, 0, M, M,
-                                  format=matrix_format)
+        return (Ex, Ey, Hz)
 
-            ex = 1/1j/self.omega * T_eps_y_inv.dot(Dyb).dot(X)
-            ey = -1/1j/self.omega * T_eps_x_inv.dot(Dxb).dot(X)
+    def _solve_fields_Ez(self, include_nl=False, timing=False, averaging=True,
+                         solver=DEFAULT_SOLVER, matrix_format=DEFAULT_MATRIX_FORMAT):
+        # solves for Ez and recovers Hx, Hy from it
 
-            Ex = ex.reshape((Nx, Ny))
-            Ey = ey.reshape((Nx, Ny))
-            Hz = X.reshape((Nx, Ny))
+        X = self._solve_primary(include_nl, timing, solver)
 
-            if include_nl==False:
-                self.fields['Ex'] = Ex
-                self.fields['Ey'] = Ey
-                self.fields['Hz'] = Hz
+        (Nx, Ny) = (self.Nx, self.Ny)
+        (Dyb, Dxb) = (self._Dyb, self._Dxb)
 
-            return (Ex, Ey, Hz)
+        # linear solves write straight into the buffer of a new field record
+        if include_nl==False:
+            fields = _Fields((Nx, Ny), self.pol)
+            Hx = fields.slab('Hx')
+            Hy = fields.slab('Hy')
+            Ez = fields.slab('Ez')
+            Ez[...] = X.reshape((Nx, Ny))
+        else:
+            Hx = np.empty((Nx, Ny), dtype=np.complex128)
+            Hy = np.empty((Nx, Ny), dtype=np.complex128)
+            Ez = X.reshape((Nx, Ny))
 
-        elif self.pol == 'Ez':
-            hx = -1/1j/self.omega/MU_0_ * Dyb.dot(X)
-            hy = 1/1j/self.omega/MU_0_ * Dxb.dot(X)
+        np.multiply(Dyb.dot(X), -self._inv_jw_mu0, out=Hx.reshape(-1))
+        np.multiply(Dxb.dot(X), self._inv_jw_mu0, out=Hy.reshape(-1))
 
-            Hx = hx.reshape((Nx, Ny))
-            Hy = hy.reshape((Nx, Ny))
-            Ez = X.reshape((Nx, Ny))
+        if include_nl==False:
+            self.fields = fields
 
-            if include_nl==False:
-                self.fields['Hx'] = Hx
-                self.fields['Hy'] = Hy
-                self.fields['Ez'] = Ez
+        return (Hx, Hy, Ez)
 
-            return (Hx, Hy, Ez)
+    def _inv_jw_eps(self, eps_scaled, averaging=True):
+        # 1/(1j*omega*eps) vectors used to recover Ex, Ey from Hz
+        # eps_scaled already includes the EPSILON_0*L0 factor
 
+        if averaging:
+            eps_x = grid_average(eps_scaled, 'x')
+            vector_eps_x = eps_x.ravel()
+            eps_y = grid_average(eps_scaled, 'y')
+            vector_eps_y = eps_y.ravel()
+            return (self._inv_jw/vector_eps_x, self._inv_jw/vector_eps_y)
         else:
-            raise ValueError('Invalid polarization: {}'.format(str(self.pol)))
+            # without averaging both components share the same inverse
+            inv_jw_eps = self._inv_jw/eps_scaled.ravel()
+            return (inv_jw_eps, inv_jw_eps)
 
     def solve_fields_nl(self,
                         timing=False, averaging=True,
@@ -205,13 +488,14 @@ class Simulation:
                 raise AssertionError("solver must be one of "
                                      "{'born', 'newton', 'LM'}")
 
-            # return final nonlinear fields and an array of the convergences
+            # the factorization of A + Anl is not reused by later solves
+            self._clear_nl_factor()
 
-            self.fields_nl['Hx'] = Hx
-            self.fields_nl['Hy'] = Hy
-            self.fields_nl['Ez'] = Ez
+            # return final nonlinear fields and an array of the convergences
+            self.fields_nl = _Fields((self.Nx, self.Ny), self.pol, Hx=Hx, Hy=Hy, Ez=Ez)
 
-            return (Hx, Hy, Ez, conv_array)
+            return (self.fields_nl.Hx, self.fields_nl.Hy, self.fields_nl.Ez,
+                    conv_array)
 
         elif self.pol == 'Hz':
             # if born solver
@@ -235,13 +519,14 @@ class Simulation:
                 raise AssertionError("solver must be one of "
                                      "{'born', 'newton'}")
 
-            # return final nonlinear fields and an array of the convergences
+            # the factorization of A + Anl is not reused by later solves
+            self._clear_nl_factor()
 
-            self.fields_nl['Ex'] = Ex
-            self.fields_nl['Ey'] = Ey
-            self.fields_nl['Hz'] = Hz
+            # return final nonlinear fields and an array of the convergences
+            self.fields_nl = _Fields((self.Nx, self.Ny), self.pol, Ex=Ex, Ey=Ey, Hz=Hz)
 
-            return (Ex, Ey, Hz, conv_array)
+            return (self.fields_nl.Ex, self.fields_nl.Ey, self.fields_nl.Hz,
+                    conv_array)
 
         else:
             raise ValueError('Invalid polarization: {}'.format(str(self.pol)))
@@ -273,62 +558,62 @@ class Simulation:
         if self.pol == 'Ez':
 
             if nl:
-                field_val_Ez = self.fields_nl['Ez']
-                field_val_Hy = self.fields_nl['Hy']
-                field_val_Hx = self.fields_nl['Hx']
+                field_val_Ez = self.fields_nl.Ez
+                field_val_Hy = self.fields_nl.Hy
+                field_val_Hx = self.fields_nl.Hx
             else:
-                field_val_Ez = self.fields['Ez']
-                field_val_Hy = self.fields['Hy']
-                field_val_Hx = self.fields['Hx']
+                field_val_Ez = self.fields.Ez
+                field_val_Hy = self.fields.Hy
+                field_val_Hx = self.fields.Hx
 
-            Ez_x = grid_average(field_val_Ez[inds_x[0]:inds_x[1]+1, inds_y[0]:inds_y[1]+1], 'x')[:-1,:-1]
-            Ez_y = grid_average(field_val_Ez[inds_x[0]:inds_x[1]+1, inds_y[0]:inds_y[1]+1], 'y')[:-1,:-1]
-            # NOTE: Last part drops the extra rows/cols used for grid_average
+            Ez_slice = field_val_Ez[inds_x[0]:inds_x[1]+1, inds_y[0]:inds_y[1]+1]
 
             if direction_normal == "x":
+                Ez_x = _grid_avg_inline(Ez_slice, 'x')
                 Sx = -1/2*np.real(Ez_x*np.conj(field_val_Hy[inds_x[0]:inds_x[1], inds_y[0]:inds_y[1]]))
                 return self.dl*np.sum(Sx)
             elif direction_normal == "y":
+                Ez_y = _grid_avg_inline(Ez_slice, 'y')
                 Sy = 1/2*np.real(Ez_y*np.conj(field_val_Hx[inds_x[0]:inds_x[1], inds_y[0]:inds_y[1]]))
                 return self.dl*np.sum(Sy)
 
         elif self.pol == 'Hz':
 
             if nl:
-                field_val_Hz = self.fields_nl['Hz']
-                field_val_Ey = self.fields_nl['Ey']
-                field_val_Ex = self.fields_nl['Ex']
+                field_val_Hz = self.fields_nl.Hz
+                field_val_Ey = self.fields_nl.Ey
+                field_val_Ex = self.fields_nl.Ex
             else:
-                field_val_Hz = self.fields['Hz']
-                field_val_Ey = self.fields['Ey']
-                field_val_Ex = self.fields['Ex']
+                field_val_Hz = self.fields.Hz
+                field_val_Ey = self.fields.Ey
+                field_val_Ex = self.fields.Ex
 
-            Hz_x = grid_average(field_val_Hz[inds_x[0]:inds_x[1]+1, inds_y[0]:inds_y[1]+1], 'x')[:-1, :-1]
-            Hz_y = grid_average(field_val_Hz[inds_x[0]:inds_x[1]+1, inds_y[0]:inds_y[1]+1], 'y')[:-1, :-1]
-            # NOTE: Last part drops the extra rows/cols used for grid_average
+            Hz_slice = field_val_Hz[inds_x[0]:inds_x[1]+1, inds_y[0]:inds_y[1]+1]
 
             if direction_normal == "x":
+                Hz_x = _grid_avg_inline(Hz_slice, 'x')
                 Sx = 1/2*np.real(field_val_Ey[inds_x[0]:inds_x[1], inds_y[0]:inds_y[1]]*np.conj(Hz_x))
                 return self.dl*np.sum(Sx)
             elif direction_normal == "y":
+                Hz_y = _grid_avg_inline(Hz_slice, 'y')
                 Sy = -1/2*np.real(field_val_Ex[inds_x[0]:inds_x[1], inds_y[0]:inds_y[1]]*np.conj(Hz_y))
                 return self.dl*np.sum(Sy)
 
     def plt_abs(self, nl=False, cbar=True, outline=True, ax=None, vmax=None, tiled_y=1):
         # plot np.absolute value of primary field (e.g. Ez/Hz)
 
-        if self.fields[self.pol] is None:
+        if getattr(self.fields, self.pol) is None:
             raise ValueError("need to solve the simulation first")
 
         eps_r = self.eps_r
-        eps_r = np.hstack(tiled_y*[eps_r])
+        eps_r = np.tile(eps_r, (1, tiled_y))
 
         if nl:
-            field_val = np.abs(self.fields_nl[self.pol])
+            field_val = np.abs(getattr(self.fields_nl, self.pol))
         else:
-            field_val = np.abs(self.fields[self.pol])
+            field_val = np.abs(getattr(self.fields, self.pol))
 
-        field_val = np.hstack(tiled_y*[field_val])
+        field_val = np.tile(field_val, (1, tiled_y))
 
         outline_val = np.abs(eps_r)
         vmin = 0.0
@@ -344,11 +629,11 @@ class Simulation:
     def init_design_region(self, design_region, eps_m, style=''):
         """ Initializes the design_region permittivity depending on style"""
 
+        in_region = design_region != 0
+
         if style == 'full':
             # eps_m filled in design region
-            eps_full = eps_m * np.ones(self.eps_r.shape)
-            eps_full[design_region == 0] = self.eps_r[design_region == 0]
-            self.eps_r = eps_full
+            self.eps_r = np.where(in_region, eps_m, self.eps_r)
 
         elif style == 'halfway':
             # halfway between 1 and eps_m in design region
@@ -358,31 +643,29 @@ class Simulation:
 
         elif style == 'empty':
             # nothing in design region
-            eps_empty = np.ones(self.eps_r.shape)
-            eps_empty[design_region == 0] = self.eps_r[design_region == 0]
-            self.eps_r = eps_empty
+            self.eps_r = np.where(in_region, 1.0, self.eps_r)
 
         elif style == 'random':
-            # random pixels in design region
-            eps_random = (eps_m-1)*np.random.random(self.eps_r.shape)+1
-            eps_random[design_region == 0] = self.eps_r[design_region == 0]
+            # random pixels in design region, only drawn for the region itself
+            eps_random = np.array(self.eps_r, dtype=np.result_type(self.eps_r, np.float64))
+            eps_random[in_region] = (eps_m-1)*np.random.random(np.count_nonzero(in_region))+1
             self.eps_r = eps_random
 
     def plt_re(self, nl=False, cbar=True, outline=True, ax=None, tiled_y=1):
         """ Plots the real part of primary field (e.g. Ez/Hz)"""
 
         eps_r = self.eps_r
-        eps_r = np.hstack(tiled_y*[eps_r])
+        eps_r = np.tile(eps_r, (1, tiled_y))
 
-        if self.fields[self.pol] is None:
+        if getattr(self.fields, self.pol) is None:
             raise ValueError("need to solve the simulation first")
 
         if nl:
-            field_val = np.abs(self.fields_nl[self.pol])
+            field_val = np.abs(getattr(self.fields_nl, self.pol))
         else:
-            field_val = np.abs(self.fields[self.pol])
+            field_val = np.abs(getattr(self.fields, self.pol))
 
-        field_val = np.hstack(tiled_y*[field_val])
+        field_val = np.tile(field_val, (1, tiled_y))
 
         outline_val = np.abs(eps_r)
         vmin = -np.abs(field_val).max()
@@ -398,19 +681,17 @@ class Simulation:
 
         # get the outline value
         eps_r = self.eps_r
-        eps_r = np.hstack(tiled_y*[eps_r])
+        eps_r = np.tile(eps_r, (1, tiled_y))
         outline_val = np.abs(eps_r)
 
-        # get the fields and tile them
-        field_lin = np.abs(self.fields['Ez'])
-        field_lin = np.hstack(tiled_y*[field_lin])
-        field_nl = np.abs(self.fields_nl['Ez'])
-        field_nl = np.hstack(tiled_y*[field_nl])
-
         # take the difference, normalize by the max E_lin field if desired
-        field_diff = field_lin - field_nl
+        field_lin = np.abs(self.fields.Ez)
+        field_diff = field_lin - np.abs(self.fields_nl.Ez)
         if normalize:
-            field_diff = field_diff/np.abs(field_lin).max()
+            field_diff /= field_lin.max()
+
+        # tile the difference only once
+        field_diff = np.tile(field_diff, (1, tiled_y))
 
         # set limits
         if vmax is None:
@@ -424,7 +705,7 @@ class Simulation:
         # plot the permittivity distribution
 
         eps_r = self.eps_r
-        eps_r = np.hstack(tiled_y*[eps_r])
+        eps_r = np.tile(eps_r, (1, tiled_y))
 
         eps_val = np.abs(eps_r)
         outline_val = np.abs(eps_r)
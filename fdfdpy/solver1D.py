@@ -36,9 +36,9 @@ def solverTM1D(wvlen, eps_r, a, dx, num_modes = 10):
     Dxf = createDws('x', 'f', [dL,1], [Nx,1], matrix_format=matrix_format);
     Dxb = createDws('x', 'b', [dL,1], [Nx,1], matrix_format=matrix_format);
     Epxx = grid_average(eps_r, 'x');
-    invTepxx = sp.spdiags(1/(eps0*Epxx), 0, Nx, Nx, format = matrix_format)
-    Tepzz = sp.spdiags(eps0*eps_r, 0, Nx,Nx, format = matrix_format)
-    A = Tepzz@Dxf@(invTepxx)@Dxb + Tepzz@sp.spdiags(omega**2*mu0*np.ones((Nx,)), 0, Nx,Nx, format = matrix_format);
+    invTepxx = sp.diags(1/(eps0*Epxx), 0, shape=(Nx, Nx), format='csr')
+    Tepzz = sp.diags(eps0*eps_r, 0, shape=(Nx, Nx), format='csr')
+    A = Tepzz@Dxf@(invTepxx)@Dxb + Tepzz@sp.diags(omega**2*mu0*np.ones((Nx,)), 0, shape=(Nx, Nx), format='csr');
     A = A.astype('complex')
 
     # get guess
@@ -70,8 +70,8 @@ def solverTE1D(wvlen, eps_r, a, dx, num_modes = 10):
     Dxf = createDws('x', 'f', [dL,1], [Nx,1], matrix_format=matrix_format);
     Dxb = createDws('x', 'f', [dL,1], [Nx,1], matrix_format=matrix_format);
     Epxx = grid_average(eps_r, 'x');
-    Tepxx = sp.spdiags(Epxx, 0, Nx, Nx, format=matrix_format)
-    Tepzz = sp.spdiags(1 / eps_r, 0, Nx, Nx, format=matrix_format)
+    Tepxx = sp.diags(Epxx, 0, shape=(Nx, Nx), format='csr')
+    Tepzz = sp.diags(1 / eps_r, 0, shape=(Nx, Nx), format='csr')
     A = Dxf @ Dxb + omega ** 2 * mu0*Tepzz
 
     #get eigenvalues
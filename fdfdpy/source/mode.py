@@ -52,12 +52,13 @@ class mode:
         simulation_norm.eps_r = norm_eps
         self.insert_mode(simulation_norm, simulation_norm.src, matrix_format=matrix_format)
         simulation_norm.solve_fields()
+        simulation_norm.clear_factor()
         W_in = simulation_norm.flux_probe(self.direction_normal, new_center, self.width)
 
         # save this value in the original simulation
         simulation.W_in = W_in
         simulation.E2_in = np.sum(np.square(np.abs(
-                        simulation_norm.fields['Ez']))*np.abs(simulation_norm.src))
+                        simulation_norm.fields.Ez))*np.abs(simulation_norm.src))
 
     def insert_mode(self, simulation, destination, matrix_format=DEFAULT_MATRIX_FORMAT):
         EPSILON_0_ = EPSILON_0*simulation.L0
@@ -81,8 +82,8 @@ class mode:
 
         vector_eps = EPSILON_0_*eps_r.reshape((-1,))
         vector_eps_x = EPSILON_0_*grid_average(eps_r, 'x').reshape((-1,))
-        T_eps = sp.spdiags(vector_eps, 0, N, N, format=matrix_format)
-        T_epsxinv = sp.spdiags(vector_eps_x**(-1), 0, N, N, format=matrix_format)
+        T_eps = sp.diags(vector_eps, 0, shape=(N, N), format='csr')
+        T_epsxinv = sp.diags(vector_eps_x**(-1), 0, shape=(N, N), format='csr')
 
         if simulation.pol == 'Ez':
             A = np.square(simulation.omega)*MU_0_*T_eps + Dxf.dot(Dxb)
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose
+
+from fdfdpy.simulation import Simulation
+
+
+class Test_Compute_NL(unittest.TestCase):
+    """ Tests the nonlinear terms and A + Anl built by compute_nl """
+
+    def setUp(self):
+
+        # a small waveguide with a kerr section
+        (Nx, Ny) = (60, 40)
+        self.eps_r = np.ones((Nx, Ny))
+        self.eps_r[:, 16:24] = 4
+        self.nl_region = np.zeros((Nx, Ny))
+        self.nl_region[20:40, 16:24] = 1
+        self.E = 1e3*np.exp(1j*np.arange(Nx*Ny)).reshape((Nx, Ny))
+
+    def make_sim(self, chi=1e-18):
+        sim = Simulation(2*np.pi*200e12, self.eps_r, 0.05, [10, 10], 'Ez', L0=1e-6)
+        sim.src[12, 20] = 1
+        sim.add_nl(chi, self.nl_region, eps_scale=True, eps_max=4)
+        return sim
+
+    def test_complex_terms(self):
+
+        # a lossy eps_r set after __init__
+        sim = self.make_sim()
+        sim.compute_nl(self.E)
+        sim.reset_eps(self.eps_r + 0.1j)
+        sim.compute_nl(self.E)
+        chi = sim.nonlinearity[0].chi
+        eps_nl = 3*chi*self.nl_region*np.abs(self.E)**2*(sim.eps_r - 1)/3
+        assert_allclose(sim.eps_nl, eps_nl)
+
+        # a complex chi
+        sim = self.make_sim(chi=1e-18*(1 + 0.1j))
+        sim.compute_nl(self.E)
+        self.assertTrue(np.iscomplexobj(sim.eps_nl))
+        sim.solve_fields_nl(solver_nl='born')
+
+    def test_A_tot(self):
+
+        sim = self.make_sim()
+
+        # solving with Anl requires compute_nl first
+        with self.assertRaises(ValueError):
+            sim.solve_fields(include_nl=True)
+
+        # A_tot is updated on the diagonal for each new field
+        for scale in [1, 2]:
+            sim.compute_nl(scale*self.E)
+            assert_allclose(sim.A_tot.toarray(), (sim.A + sim.Anl).toarray())
+
+        # and rebuilt from the last Anl when eps_r is reset
+        sim.reset_eps(1.5*self.eps_r)
+        assert_allclose(sim.A_tot.toarray(), (sim.A + sim.Anl).toarray())
+        sim.solve_fields(include_nl=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose
+
+from fdfdpy.simulation import Simulation
+
+
+class Test_Design_Region(unittest.TestCase):
+    """ Tests the styles of init_design_region """
+
+    def setUp(self):
+
+        (Nx, Ny) = (40, 30)
+        self.eps_r = np.ones((Nx, Ny))
+        self.eps_r[:, 12:18] = 4
+        self.design_region = np.zeros((Nx, Ny))
+        self.design_region[15:25, 5:25] = 1
+        self.in_region = self.design_region == 1
+        self.eps_m = 6
+
+    def make_sim(self):
+        return Simulation(2*np.pi*200e12, self.eps_r.copy(), 0.05, [10, 10], 'Ez', L0=1e-6)
+
+    def check_outside(self, sim):
+        assert_allclose(sim.eps_r[~self.in_region], self.eps_r[~self.in_region])
+
+    def test_styles(self):
+
+        for (style, eps_in) in [('full', self.eps_m), ('halfway', self.eps_m/2 + 1/2),
+                                ('empty', 1)]:
+            sim = self.make_sim()
+            sim.init_design_region(self.design_region, self.eps_m, style=style)
+            assert_allclose(sim.eps_r[self.in_region], eps_in)
+            self.check_outside(sim)
+
+        # random pixels between 1 and eps_m, only inside the region
+        sim = self.make_sim()
+        sim.init_design_region(self.design_region, self.eps_m, style='random')
+        eps_in = sim.eps_r[self.in_region]
+        self.assertTrue(np.all((eps_in >= 1) & (eps_in < self.eps_m)))
+        self.assertGreater(np.unique(eps_in).size, 1)
+        self.check_outside(sim)
+
+    def test_rebuilds_A(self):
+
+        # the new permittivity goes through the eps_r setter
+        sim = self.make_sim()
+        sim.init_design_region(self.design_region, self.eps_m, style='full')
+        ref = Simulation(sim.omega, sim.eps_r.copy(), 0.05, [10, 10], 'Ez', L0=1e-6)
+        assert_allclose(sim.A.toarray(), ref.A.toarray())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose
+
+from fdfdpy.simulation import Simulation, _Fields
+from fdfdpy.linalg import grid_average
+from fdfdpy.derivatives import unpack_derivs
+from fdfdpy.constants import EPSILON_0, MU_0
+
+
+class Test_Fields(unittest.TestCase):
+    """ Tests the field record and the recovered field components """
+
+    def setUp(self):
+
+        # a small waveguide
+        (Nx, Ny) = (60, 40)
+        self.eps_r = np.ones((Nx, Ny))
+        self.eps_r[:, 16:24] = 4
+        self.shape = (Nx, Ny)
+
+    def make_sim(self, pol='Ez'):
+        sim = Simulation(2*np.pi*200e12, self.eps_r, 0.05, [10, 10], pol, L0=1e-6)
+        sim.src[12, 20] = 1
+        return sim
+
+    def recover_Hz(self, sim, Hz, eps_tot, averaging):
+        # Ex, Ey from Hz as solve_fields computed them before they were cached
+
+        if averaging:
+            vector_eps_x = grid_average(EPSILON_0*sim.L0*eps_tot, 'x').ravel()
+            vector_eps_y = grid_average(EPSILON_0*sim.L0*eps_tot, 'y').ravel()
+        else:
+            vector_eps_x = vector_eps_y = EPSILON_0*sim.L0*eps_tot.ravel()
+        (Dyb, Dxb, _, _) = unpack_derivs(sim.derivs)
+        Ex = 1/1j/sim.omega*Dyb.dot(Hz.ravel())/vector_eps_y
+        Ey = -1/1j/sim.omega*Dxb.dot(Hz.ravel())/vector_eps_x
+        return (Ex.reshape(self.shape), Ey.reshape(self.shape))
+
+    def test_dict_interface(self):
+
+        fields = _Fields(self.shape, 'Ez')
+        self.assertEqual(list(fields), ['Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'])
+        self.assertEqual(fields.keys(), list(fields))
+        self.assertTrue(all(value is None for value in fields.values()))
+
+        fields['Ez'] = np.ones(self.shape)
+        assert_allclose(fields.Ez, 1)
+        self.assertIsNone(fields['Hz'])
+        self.assertEqual(dict(fields.items())['Ez'].shape, self.shape)
+
+        fields.Ez = None
+        self.assertIsNone(fields['Ez'])
+        with self.assertRaises(KeyError):
+            fields['buf']
+
+        # solved fields are set until eps_r changes
+        sim = self.make_sim()
+        (Hx, Hy, Ez) = sim.solve_fields()
+        assert_allclose(sim.fields['Hx'], Hx)
+        assert_allclose(sim.fields['Ez'], Ez)
+        self.assertIsNone(sim.fields['Hz'])
+        sim.reset_eps(self.eps_r)
+        self.assertTrue(all(value is None for value in sim.fields.values()))
+
+    def test_results_kept(self):
+
+        # arrays returned by earlier solves survive later ones
+        for pol in ['Ez', 'Hz']:
+            sim = self.make_sim(pol)
+            first = sim.solve_fields()
+            kept = [f.copy() for f in first]
+            sim.src[40, 20] = 5j
+            second = sim.solve_fields()
+            for (f, f_kept, f_new) in zip(first, kept, second):
+                assert_allclose(f, f_kept)
+                self.assertFalse(np.shares_memory(f, f_new))
+
+    def test_allocation(self):
+
+        # only the components of the polarization, allocated when first set
+        fields = _Fields(self.shape, 'Hz')
+        self.assertIsNone(fields.buf)
+        fields.Hz = np.ones(self.shape)
+        self.assertEqual(fields.buf.shape, (3,) + self.shape)
+        self.assertIsNone(fields.Ez)
+        with self.assertRaises(ValueError):
+            fields.Ez = np.ones(self.shape)
+
+        sim = self.make_sim('Hz')
+        self.assertIsNone(sim.fields.buf)
+        sim.solve_fields()
+        self.assertEqual(sim.fields.buf.shape, (3,) + self.shape)
+        self.assertIsNone(sim.fields_nl.buf)
+
+    def test_Hz_no_averaging(self):
+
+        # Ex and Ey share one inverse permittivity without averaging
+        sim = self.make_sim('Hz')
+        sim.add_nl(1e-13, np.ones(self.shape))
+        (Ex, Ey, Hz) = sim.solve_fields(averaging=False)
+        for (f, f_ref) in zip((Ex, Ey), self.recover_Hz(sim, Hz, sim.eps_r, False)):
+            assert_allclose(f, f_ref, rtol=1e-10)
+
+        # eps_nl of up to ~0.3
+        sim.compute_nl(Hz/np.abs(Hz).max())
+        (Ex, Ey, Hz) = sim.solve_fields(include_nl=True, averaging=False)
+        eps_tot = sim.eps_r + sim.eps_nl
+        for (f, f_ref) in zip((Ex, Ey), self.recover_Hz(sim, Hz, eps_tot, False)):
+            assert_allclose(f, f_ref, rtol=1e-10)
+
+    def test_recovery_scaling(self):
+
+        # Hz with averaging, linear and with eps_nl of up to ~0.3
+        sim = self.make_sim('Hz')
+        sim.add_nl(1e-13, np.ones(self.shape))
+        (Ex, Ey, Hz) = sim.solve_fields()
+        for (f, f_ref) in zip((Ex, Ey), self.recover_Hz(sim, Hz, sim.eps_r, True)):
+            assert_allclose(f, f_ref, rtol=1e-10)
+        sim.compute_nl(Hz/np.abs(Hz).max())
+        (Ex, Ey, Hz) = sim.solve_fields(include_nl=True)
+        eps_tot = sim.eps_r + sim.eps_nl
+        for (f, f_ref) in zip((Ex, Ey), self.recover_Hz(sim, Hz, eps_tot, True)):
+            assert_allclose(f, f_ref, rtol=1e-10)
+
+        # Ez, also after changing omega before a reset
+        sim = self.make_sim('Ez')
+        sim.solve_fields()
+        sim.omega *= 1.2
+        sim.reset_eps(self.eps_r)
+        (Hx, Hy, Ez) = sim.solve_fields()
+        (Dyb, Dxb, _, _) = unpack_derivs(sim.derivs)
+        inv_jw_mu = 1/1j/sim.omega/(MU_0*sim.L0)
+        assert_allclose(Hx.ravel(), -inv_jw_mu*Dyb.dot(Ez.ravel()), rtol=1e-10)
+        assert_allclose(Hy.ravel(), inv_jw_mu*Dxb.dot(Ez.ravel()), rtol=1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
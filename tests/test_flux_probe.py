@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose
+
+from fdfdpy.simulation import Simulation, _grid_avg_inline
+from fdfdpy.linalg import grid_average
+
+
+class Test_Flux_Probe(unittest.TestCase):
+    """ Tests the inline grid averaging used by flux_probe """
+
+    def test_grid_avg_inline(self):
+
+        # the probe slices are two cells thick in the averaging direction
+        np.random.seed(0)
+        for (w, shape) in [('x', (2, 31)), ('y', (31, 2))]:
+            field_slice = np.random.random(shape) + 1j*np.random.random(shape)
+            assert_allclose(_grid_avg_inline(field_slice, w),
+                            grid_average(field_slice, w)[:-1, :-1])
+
+    def test_flux_probe(self):
+
+        # flux_probe against the grid_average expression it used before
+        (Nx, Ny) = (60, 40)
+        eps_r = np.ones((Nx, Ny))
+        eps_r[:, 16:24] = 4
+        sim = Simulation(2*np.pi*200e12, eps_r, 0.05, [10, 10], 'Ez', L0=1e-6)
+        sim.src[12, 20] = 1
+        (Hx, Hy, Ez) = sim.solve_fields()
+
+        (center, width) = ([40, 20], 20)
+        (x0, y0, y1) = (center[0], int(center[1]-width/2), int(center[1]+width/2))
+        Ez_x = grid_average(Ez[x0:x0+2, y0:y1+1], 'x')[:-1, :-1]
+        Sx = -1/2*np.real(Ez_x*np.conj(Hy[x0:x0+1, y0:y1]))
+        assert_allclose(sim.flux_probe('x', center, width), sim.dl*np.sum(Sx))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import numpy as np
+import scipy.sparse.linalg as spl
+from copy import deepcopy
+from numpy.testing import assert_allclose
+
+from fdfdpy.simulation import Simulation
+
+
+class Test_Solver_Cache(unittest.TestCase):
+    """ Tests the cached factorizations of A and A + Anl """
+
+    def setUp(self):
+
+        # a small waveguide with a kerr section, solved with pardiso
+        (Nx, Ny) = (60, 40)
+        self.eps_r = np.ones((Nx, Ny))
+        self.eps_r[:, 16:24] = 4
+        self.nl_region = np.zeros((Nx, Ny))
+        self.nl_region[20:40, 16:24] = 1
+        self.shape = (Nx, Ny)
+
+    def make_sim(self, pol='Ez'):
+        sim = Simulation(2*np.pi*200e12, self.eps_r, 0.05, [10, 10], pol, L0=1e-6)
+        sim.src[12, 20] = 1
+        sim.add_nl(1e-18, self.nl_region)
+        return sim
+
+    def spsolve(self, A, sim):
+        return spl.spsolve(A.tocsc(), sim.src.ravel()*1j*sim.omega)
+
+    def test_factor_reuse(self):
+
+        for pol in ['Ez', 'Hz']:
+            sim = self.make_sim(pol)
+
+            # the second solve reuses the factorization of the first
+            sim.solve_fields()
+            A_lu = sim._A_lu
+            sim.src[30, 20] = 1j
+            primary = sim.solve_fields()[2]
+            self.assertIs(sim._A_lu, A_lu)
+            assert_allclose(primary.ravel(), self.spsolve(sim.A, sim), rtol=1e-10)
+
+            # a new eps_r drops it, and the next solve uses the new A
+            sim.reset_eps(1.5*self.eps_r)
+            self.assertIsNone(sim._A_lu)
+            primary = sim.solve_fields()[2]
+            assert_allclose(primary.ravel(), self.spsolve(sim.A, sim), rtol=1e-10)
+
+            # the same goes for switching solvers
+            primary = sim.solve_fields(solver='scipy')[2]
+            self.assertEqual(sim._A_lu_solver, 'scipy')
+            assert_allclose(primary.ravel(), self.spsolve(sim.A, sim), rtol=1e-10)
+
+    def test_factor_release(self):
+
+        # copies do not share the factorization, and clear_factor frees it
+        sim = self.make_sim()
+        sim.solve_fields()
+        self.assertIsNone(deepcopy(sim)._A_lu)
+        sim.clear_factor()
+        self.assertIsNone(sim._A_lu)
+
+    def test_solve_nl(self):
+
+        for solver in ['pardiso', 'scipy']:
+            for pol in ['Ez', 'Hz']:
+                sim = self.make_sim(pol)
+                sim.solve_fields(solver=solver)
+                E = 1e3*np.ones(self.shape)
+
+                # the first solve refines against the factorization of A, the later
+                # ones against that of A + Anl at an earlier field
+                for scale in [1, 1.1, 3]:
+                    sim.compute_nl(scale*E)
+                    primary = sim.solve_fields(include_nl=True, solver=solver)[2]
+                    assert_allclose(primary.ravel(), self.spsolve(sim.A + sim.Anl, sim),
+                                    rtol=1e-10)
+
+    def test_solve_fields_nl(self):
+
+        # Born through the cached factorizations against direct solves of A + Anl
+        sim = self.make_sim()
+        sim.src *= 1e3
+        (_, _, Ez, _) = sim.solve_fields_nl(solver_nl='born', conv_threshold=1e-12)
+        self.assertIsNone(sim._A_nl_lu)
+        sim.compute_nl(Ez)
+        assert_allclose(Ez.ravel(), self.spsolve(sim.A + sim.Anl, sim), rtol=1e-8)
+
+    def test_factor_not_aliased(self):
+
+        # compute_nl updates A_tot in place, which must not change the cached factor
+        sim = self.make_sim()
+        sim.compute_nl(1e3*np.ones(self.shape))
+        sim.solve_fields(include_nl=True)
+        b = np.random.random(self.eps_r.size) + 0j
+        x = sim._A_nl_lu.solve(b)
+        sim.compute_nl(5e3*np.ones(self.shape))
+        assert_allclose(sim._A_nl_lu.solve(b), x)
+
+
+if __name__ == '__main__':
+    unittest.main()